@@ -16,28 +16,119 @@ Fixes applied:
      checked across ALL halves, not just within the same half)
 """
 
+import argparse
+import contextlib
+import io
 import json
 import re
+import sys
 from datetime import time
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum
 from collections import defaultdict, Counter
+from itertools import groupby
+from operator import attrgetter
+
+try:                        # optional: faster JSON export when installed
+    import orjson
+except ImportError:
+    orjson = None
+
+try:                        # optional: CP-SAT backend (pip install ortools)
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+class SessionType(IntEnum):
+    # Plain ints so comparisons and table lookups stay at C level; use
+    # SESSION_NAMES for display.
+    LECTURE    = 0
+    TUTORIAL   = 1
+    PRACTICAL  = 2
+
+
+# Per-session-type tables, indexed by SessionType
+SESSION_NAMES  = ("Lecture", "Tutorial", "Practical")
+# Slot length (hours) each session type needs
+_SESSION_HOURS = (1.5, 1.0, 2.0)
+# One bit per session type, used in the per-(course, day) session masks
+_SESSION_BIT   = (1, 2, 4)
+_THEORY_PAIR = _SESSION_BIT[SessionType.LECTURE] | _SESSION_BIT[SessionType.TUTORIAL]
+
+# Daily-limit rule as a lookup table: _FORBIDDEN_NEXT[day_mask] holds the
+# session-type bits that may NOT be added to a day whose sessions so far are
+# `day_mask`.  Same type twice, Lecture+Tutorial and Lecture+Practical are
+# forbidden; any day that already has 2 sessions is full.
+_FORBIDDEN_NEXT = (
+    0b000,   # nothing yet
+    0b111,   # L       → L, T, P
+    0b011,   # T       → T, L
+    0b111,   # L+T     (full)
+    0b101,   # P       → P, L
+    0b111,   # L+P     (full)
+    0b111,   # T+P     (full)
+    0b111,   # L+T+P   (full)
+)
+
+# Conflict-reason codes.  The search counts rejections into a plain list
+# indexed by these codes; the list is folded into `conflict_reasons` once per
+# course (see ImprovedScheduler._flush_reasons).
+(R_FACULTY, R_STUDENTS, R_MAX_PER_DAY, R_TWO_LECTURES, R_TWO_TUTORIALS,
+ R_TWO_PRACTICALS, R_LECTURE_TUTORIAL, R_LECTURE_PRACTICAL,
+ R_WRONG_DURATION, R_ROOM, R_NO_ROOM, R_CPSAT_UNPLACED) = range(12)
+
+REASON_NAMES = (
+    "Faculty busy",
+    "Students busy",
+    "Max 2 sessions/day exceeded",
+    "Two Lectures same day",
+    "Two Tutorials same day",
+    "Two Practicals same day",
+    "Lecture+Tutorial same day",
+    "Lecture+Practical same day",
+    "Wrong duration",
+    "Room occupied",
+    "No suitable room",
+    "Not placed by CP-SAT",
+)
+
+# Slot preference order is recomputed after every this-many courses
+_SLOT_REORDER_EVERY = 10
+
+# CP-SAT backend: wall-clock budget and parallel search workers
+_CPSAT_TIME_LIMIT_S = 60.0
+_CPSAT_WORKERS      = 8
+
+_SAME_TYPE_REASON = (R_TWO_LECTURES, R_TWO_TUTORIALS, R_TWO_PRACTICALS)
 
-class SessionType(Enum):
-    LECTURE    = "Lecture"
-    TUTORIAL   = "Tutorial"
-    PRACTICAL  = "Practical"
 
-@dataclass
 class TimeSlot:
-    day:            str
-    start_time:     time
-    end_time:       time
-    duration_hours: float
+    """A bookable window on one weekday.  Immutable in practice, so the hash
+    and display string are computed once at construction."""
+    __slots__ = ("day", "start_time", "end_time", "duration_hours",
+                 "idx", "bit", "conflict_mask", "start_str", "end_str",
+                 "_str", "_hash")
+
+    def __init__(self, day: str, start_time: time, end_time: time,
+                 duration_hours: float):
+        self.day            = day
+        self.start_time     = start_time
+        self.end_time       = end_time
+        self.duration_hours = duration_hours
+        # Position in ImprovedScheduler.time_slots and the matching bitmask bit
+        self.idx            = 0
+        self.bit            = 0
+        # OR of `bit` for every slot that overlaps this one (itself included)
+        self.conflict_mask  = 0
+        # "HH:MM" strings used by every export
+        self.start_str      = start_time.strftime("%H:%M")
+        self.end_str        = end_time.strftime("%H:%M")
+        self._hash = hash((day, start_time, end_time))
+        self._str  = f"{day} {self.start_str}-{self.end_str}"
 
     def __hash__(self):
-        return hash((self.day, self.start_time, self.end_time))
+        return self._hash
 
     def __eq__(self, other):
         return (self.day == other.day and
@@ -51,7 +142,10 @@ class TimeSlot:
         return self.start_time < other.end_time and other.start_time < self.end_time
 
     def __str__(self):
-        return f"{self.day} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}"
+        return self._str
+
+    def __repr__(self):
+        return f"TimeSlot({self._str}, {self.duration_hours}h)"
 
 
 @dataclass
@@ -70,13 +164,24 @@ class Course:
     is_elective:  bool
     basket:       Optional[str] = None
     num_students: int = 60
+    _student_key: str = field(init=False, repr=False, compare=False)
+    _rank:        int = field(init=False, repr=False, compare=False, default=0)
+
+    def __post_init__(self):
+        # Strings used as scheduler dict keys are interned so lookups hit the
+        # identity fast path; the student key is built once here.
+        self.course_id     = sys.intern(self.course_id)
+        self.semester_half = sys.intern(self.semester_half)
+        self.faculty_name  = sys.intern(self.faculty_name)
+        if self.section:
+            key = f"{self.branch}_{self.section}_Sem{self.semester}"
+        else:
+            key = f"{self.branch}_Year{(self.semester + 1) // 2}"
+        self._student_key = sys.intern(key)
 
     def get_student_key(self) -> str:
         """Unique identifier for the student group that attends this course."""
-        if self.section:
-            return f"{self.branch}_{self.section}_Sem{self.semester}"
-        year = (self.semester + 1) // 2
-        return f"{self.branch}_Year{year}"
+        return self._student_key
 
 
 @dataclass
@@ -84,6 +189,9 @@ class Room:
     room_id:  str
     capacity: int
 
+    def __post_init__(self):
+        self.room_id = sys.intern(self.room_id)
+
 
 @dataclass
 class ScheduledSession:
@@ -97,12 +205,43 @@ class ScheduledSession:
 
 
 # ---------------------------------------------------------------------------
-# Helper: overlap-aware "is busy" check
+# Helper: slot-set size
 # ---------------------------------------------------------------------------
 
-def _slot_overlaps_any(slot: TimeSlot, booked: List[TimeSlot]) -> bool:
-    """Return True if `slot` overlaps with any slot in `booked`."""
-    return any(slot.overlaps(b) for b in booked)
+def _popcount(mask: int) -> int:
+    """Number of slots in a slot bitmask (int.bit_count needs Python 3.10)."""
+    return bin(mask).count("1")
+
+
+# ---------------------------------------------------------------------------
+# Search kernel
+# ---------------------------------------------------------------------------
+
+def _search_feasible(time_free: int, room_busy: List[int],
+                     slot_order: List[int]) -> Tuple[int, int, int]:
+    """
+    Pure-integer core of the session search, kept free of dataclasses and
+    dicts so the hot path is a handful of int operations.
+
+    `time_free` is the set of slots that pass every time-only check,
+    `room_busy[r]` the busy footprint of the r-th suitable room and
+    `slot_order` the slot bits in preference order.  Returns (slot index,
+    room index, tried) for the first slot in `slot_order` that has a free
+    room, and the first such room; `tried` is the set of slots that came
+    before it.  Returns (-1, -1, tried) when nothing fits.
+    """
+    any_free = 0
+    for busy in room_busy:
+        any_free |= time_free & ~busy
+
+    tried = 0
+    for bit in slot_order:
+        if any_free & bit:
+            for room_idx, busy in enumerate(room_busy):
+                if not busy & bit:
+                    return bit.bit_length() - 1, room_idx, tried
+        tried |= bit
+    return -1, -1, tried
 
 
 # ---------------------------------------------------------------------------
@@ -132,25 +271,40 @@ class ImprovedScheduler:
         self.rooms   = rooms
         self.schedule: List[ScheduledSession] = []
 
-        # ---- tracking structures (keyed by normalised faculty name) ----
-        # FIX #1 & #6: store ALL booked slots per faculty (across all halves)
-        # so overlap checks work regardless of semester_half assignment.
-        self.faculty_slots:  Dict[str, List[TimeSlot]] = defaultdict(list)
-        # Rooms are physical – always check across all halves
-        self.room_slots:     Dict[str, List[TimeSlot]] = defaultdict(list)
-        # Student group → booked slots (within same semester_half)
-        self.student_slots:  Dict[str, Dict[str, List[TimeSlot]]] = \
-            defaultdict(lambda: defaultdict(list))
-
-        # Per-course, per-day session-type list (for daily-limit rule)
-        self.course_daily:   Dict[str, Dict[str, List[SessionType]]] = \
-            defaultdict(lambda: defaultdict(list))
-
         # ---- time slots ----
         self.time_slots = self._generate_time_slots()
         self.slots_by_duration: Dict[float, List[TimeSlot]] = defaultdict(list)
+        self.duration_masks:    Dict[float, int] = defaultdict(int)
+        self.day_masks:         Dict[str, int]   = defaultdict(int)
         for s in self.time_slots:
             self.slots_by_duration[s.duration_hours].append(s)
+            self.duration_masks[s.duration_hours] |= s.bit
+            self.day_masks[s.day]                 |= s.bit
+        # Slot bits per duration in search-preference order; kept in sync
+        # with slots_by_duration by _reorder_slots
+        self.slot_order: Dict[float, List[int]] = {
+            d: [s.bit for s in slots] for d, slots in self.slots_by_duration.items()}
+
+        # ---- tracking structures ----
+        # Busy slots are stored as int bitmasks: bit i set ↔ time_slots[i]
+        # overlaps something already booked (each booking ORs in the slot's
+        # conflict_mask).  All keys are created up front so lookups are a
+        # single plain-dict hit.
+        # FIX #1 & #6: track ALL bookings per (normalised) faculty name,
+        # across all halves, so overlap checks work regardless of semester_half.
+        self.faculty_slots:  Dict[str, int] = {c.faculty_name: 0 for c in courses}
+        # Rooms are physical – always check across all halves
+        self.room_slots:     Dict[str, int] = {r.room_id: 0 for r in rooms}
+        # (student group, semester_half) → busy slots
+        self.student_slots:  Dict[Tuple[str, str], int] = {
+            (c.get_student_key(), c.semester_half): 0 for c in courses}
+
+        # (course_id, day) → mask of _SESSION_BIT values (for daily-limit rule)
+        self.course_daily:   Dict[Tuple[str, str], int] = {
+            (c.course_id, day): 0 for c in courses for day in self.day_masks}
+        # slot index → how many faculty, rooms and student groups are busy in
+        # it; kept up to date by _record_session for _reorder_slots
+        self.slot_occupancy: List[int] = [0] * len(self.time_slots)
 
         # ---- room categories ----
         self.big_rooms     = sorted([r for r in rooms if r.capacity >= 100],
@@ -171,6 +325,9 @@ class ImprovedScheduler:
         self.elective_baskets = self._detect_baskets()
         self.basket_slots:    Dict[str, TimeSlot] = {}   # basket_id → pinned slot
 
+        # ---- per-session-type search, specialised once ----
+        self._checkers = {st: self._make_checker(st) for st in SessionType}
+
         print("📚 Loaded:")
         print(f"  Courses       : {len(courses)}")
         print(f"  Big rooms     : {[f'{r.room_id}({r.capacity})' for r in self.big_rooms]}")
@@ -183,25 +340,25 @@ class ImprovedScheduler:
     # ------------------------------------------------------------------
 
     def _detect_baskets(self) -> Dict[str, List[Course]]:
-        """Group electives into baskets by (semester, branch, semester_half)."""
-        baskets: Dict[str, List[Course]] = defaultdict(list)
-        basket_counter = 1
-        elective_groups: Dict[tuple, List[Course]] = defaultdict(list)
-
-        for course in self.courses:
-            if course.is_elective:
-                key = (course.semester, course.branch, course.semester_half)
-                elective_groups[key].append(course)
-
-        for key, group in elective_groups.items():
+        """Group electives into baskets by (semester, branch, semester_half).
+        Baskets are numbered in that key order."""
+        baskets: Dict[str, List[Course]] = {}
+        key = attrgetter("semester", "branch", "semester_half")
+
+        electives = [c for c in self.courses if c.is_elective]
+        # stable: keeps input order in a group.  Branch may be None in the
+        # input ("Branch": null), so order it explicitly rather than by `<`.
+        electives.sort(key=lambda c: (c.semester, c.branch is None,
+                                      c.branch or "", c.semester_half))
+        for _, grp in groupby(electives, key=key):
+            group = list(grp)
             if len(group) > 1:
-                basket_id = f"B{basket_counter}"
+                basket_id = f"B{len(baskets) + 1}"
                 for course in group:
                     course.basket = basket_id
-                    baskets[basket_id].append(course)
-                basket_counter += 1
+                baskets[basket_id] = group
 
-        return dict(baskets)
+        return baskets
 
     # ------------------------------------------------------------------
     # Time-slot generation
@@ -230,6 +387,14 @@ class ImprovedScheduler:
             slots.append(TimeSlot(day, time(11, 0), time(13,  0), 2.0))
             slots.append(TimeSlot(day, time(14, 0), time(16,  0), 2.0))
             slots.append(TimeSlot(day, time(16, 0), time(18,  0), 2.0))
+
+        for i, slot in enumerate(slots):
+            slot.idx = i
+            slot.bit = 1 << i
+        # Overlap relation is static, so fold it into one mask per slot:
+        # "is `slot` busy?" becomes `booked_mask & slot.conflict_mask`.
+        for slot in slots:
+            slot.conflict_mask = sum(o.bit for o in slots if o.overlaps(slot))
         return slots
 
     # ------------------------------------------------------------------
@@ -246,75 +411,45 @@ class ImprovedScheduler:
                 if r.capacity >= course.num_students]
 
     # ------------------------------------------------------------------
-    # Constraint checking  (FIX #1, #3, #6)
+    # Constraint checking  (FIX #3)
     # ------------------------------------------------------------------
 
-    def _check_constraints(self, course: Course, session_type: SessionType,
-                           time_slot: TimeSlot, room: Room) -> Tuple[bool, str]:
-
-        # FIX #6 + FIX #1: check faculty across ALL semester-halves using overlap
-        if _slot_overlaps_any(time_slot, self.faculty_slots[course.faculty_name]):
-            self.conflict_reasons["Faculty busy"] += 1
-            return False, "Faculty busy"
-
-        # FIX #1: room conflict via overlap (not equality)
-        if _slot_overlaps_any(time_slot, self.room_slots[room.room_id]):
-            self.conflict_reasons["Room occupied"] += 1
-            return False, "Room occupied"
-
-        # FIX #1: student conflict via overlap (within same semester_half)
-        student_key   = course.get_student_key()
-        semester_half = course.semester_half
-        if _slot_overlaps_any(time_slot,
-                              self.student_slots[student_key][semester_half]):
-            self.conflict_reasons["Students busy"] += 1
-            return False, "Students busy"
-
-        # Daily limit: max 2 sessions per course per day, no same-type repeats,
-        # no lecture+tutorial on same day.
-        day            = time_slot.day
-        daily_sessions = self.course_daily[course.course_id][day]
-
-        if len(daily_sessions) >= 2:
-            self.conflict_reasons["Max 2 sessions/day exceeded"] += 1
-            return False, "Course already has 2 sessions today"
-
-        if len(daily_sessions) == 1:
-            et = daily_sessions[0]
-
-            if session_type == et:
-                # Same type twice on same day is never allowed
-                self.conflict_reasons[f"Two {session_type.value}s same day"] += 1
-                return False, f"Already has a {session_type.value} today"
-
-            # FIX #3: lecture + practical on same day means the students would
-            # have a lecture that overlaps with the practical window – also disallow
-            if {session_type, et} == {SessionType.LECTURE, SessionType.TUTORIAL}:
-                self.conflict_reasons["Lecture+Tutorial same day"] += 1
-                return False, "Already has a theory session today"
-
-            # FIX #3: lecture and practical both occupy large parts of the day;
-            # also disallow them on the same day to prevent overlap issues
-            if {session_type, et} == {SessionType.LECTURE, SessionType.PRACTICAL}:
-                self.conflict_reasons["Lecture+Practical same day"] += 1
-                return False, "Already has lecture+practical today"
-
-        # Duration sanity check
-        required = {SessionType.LECTURE: 1.5,
-                    SessionType.TUTORIAL: 1.0,
-                    SessionType.PRACTICAL: 2.0}
-        if time_slot.duration_hours != required[session_type]:
-            self.conflict_reasons["Wrong duration"] += 1
-            return False, "Wrong duration"
-
-        return True, "OK"
+    @staticmethod
+    def _daily_violation(day_mask: int, session_type: SessionType) -> Optional[int]:
+        """Return the reason code of the daily-limit rule broken by adding
+        `session_type` to a day whose sessions so far are `day_mask`, or None
+        if it is allowed."""
+        bit = _SESSION_BIT[session_type]
+        if not _FORBIDDEN_NEXT[day_mask] & bit:
+            return None
+
+        # Slow path: only work out *which* rule fired once we know one did
+        if day_mask & (day_mask - 1):          # 2+ bits set
+            return R_MAX_PER_DAY
+        if day_mask & bit:
+            # Same type twice on same day is never allowed
+            return _SAME_TYPE_REASON[session_type]
+        # FIX #3: lecture + tutorial on the same day would give students two
+        # theory sessions – disallow
+        if day_mask | bit == _THEORY_PAIR:
+            return R_LECTURE_TUTORIAL
+        # FIX #3: lecture and practical both occupy large parts of the day;
+        # also disallow them on the same day to prevent overlap issues
+        return R_LECTURE_PRACTICAL
+
+    def _flush_reasons(self, counts: List[int]) -> None:
+        """Fold a course's per-reason rejection counts into conflict_reasons."""
+        for code, count in enumerate(counts):
+            if count:
+                self.conflict_reasons[REASON_NAMES[code]] += count
 
     # ------------------------------------------------------------------
     # Core scheduling
     # ------------------------------------------------------------------
 
     def _record_session(self, course: Course, session_type: SessionType,
-                        time_slot: TimeSlot, room: Room, session_number: int) -> None:
+                        time_slot: TimeSlot, room: Room, session_number: int,
+                        student_key: str) -> None:
         """Append a session to the schedule and update all tracking structures."""
         session = ScheduledSession(
             course         = course,
@@ -326,36 +461,126 @@ class ImprovedScheduler:
             basket         = course.basket,
         )
         self.schedule.append(session)
-        self.faculty_slots[course.faculty_name].append(time_slot)
-        self.room_slots[room.room_id].append(time_slot)
-        self.student_slots[course.get_student_key()][course.semester_half].append(time_slot)
-        self.course_daily[course.course_id][time_slot.day].append(session_type)
+        footprint = time_slot.conflict_mask
+        occupancy = self.slot_occupancy
+        for tracker, key in ((self.faculty_slots, course.faculty_name),
+                             (self.room_slots,    room.room_id),
+                             (self.student_slots, (student_key, course.semester_half))):
+            busy = tracker[key]
+            # Only slots this booking newly blocks for `key` raise occupancy
+            fresh = footprint & ~busy
+            tracker[key] = busy | footprint
+            while fresh:
+                low = fresh & -fresh
+                occupancy[low.bit_length() - 1] += 1
+                fresh ^= low
+        self.course_daily[(course.course_id, time_slot.day)]   |= _SESSION_BIT[session_type]
+
+    def _make_checker(self, session_type: SessionType) -> Callable[..., Tuple[int, int]]:
+        """
+        Build the slot/room search for one session type, with its candidate
+        duration mask and daily-limit reason table baked in, so
+        `_schedule_session` picks a checker once and nothing per-type is
+        looked up while searching.
+        """
+        hours         = _SESSION_HOURS[session_type]
+        duration_mask = self.duration_masks[hours]
+        # daily_reason[day_mask] → R_* code, or None if this type is allowed
+        daily_reason  = tuple(self._daily_violation(day_mask, session_type)
+                              for day_mask in range(len(_FORBIDDEN_NEXT)))
+        day_masks     = list(self.day_masks.items())
+        slot_order    = self.slot_order        # re-sorted by _reorder_slots
+        faculty_slots = self.faculty_slots
+        student_slots = self.student_slots
+        room_slots    = self.room_slots
+        course_daily  = self.course_daily
+
+        def check(course: Course, student_key: str, suitable_rooms: List[Room],
+                  counts: List[int],
+                  forced_slot: Optional[TimeSlot] = None) -> Tuple[int, int]:
+            if forced_slot is not None:
+                candidates = forced_slot.bit
+                order      = [forced_slot.bit]
+            else:
+                candidates = duration_mask
+                order      = slot_order[hours]
+
+            # FIX #6: faculty is checked across ALL semester-halves; students
+            # within their own half.  Each set excludes slots already rejected
+            # by an earlier check so reasons are attributed once per slot.
+            faculty_busy = faculty_slots[course.faculty_name]
+            student_busy = (student_slots[(student_key, course.semester_half)]
+                            & ~faculty_busy)
+            blocked      = faculty_busy | student_busy
+
+            daily_busy: List[Tuple[int, int]] = []
+            course_id = course.course_id
+            for day, day_slots in day_masks:
+                reason = daily_reason[course_daily[(course_id, day)]]
+                if reason is not None:
+                    daily_busy.append((reason, day_slots & ~blocked))
+                    blocked |= day_slots
+
+            wrong_duration = ~duration_mask & ~blocked
+            time_free      = candidates & ~(blocked | wrong_duration)
+
+            room_busy = [room_slots[room.room_id] for room in suitable_rooms]
+            slot_idx, room_idx, tried = _search_feasible(time_free, room_busy, order)
+            tried &= candidates
+
+            # Conflict breakdown for every slot tried before the chosen one;
+            # the chosen slot adds `room_idx` occupied rooms
+            counts[R_FACULTY]  += _popcount(tried & faculty_busy)
+            counts[R_STUDENTS] += _popcount(tried & student_busy)
+            for reason, day_slots in daily_busy:
+                counts[reason] += _popcount(tried & day_slots)
+            counts[R_WRONG_DURATION] += _popcount(tried & wrong_duration)
+            counts[R_ROOM] += (_popcount(tried & time_free) * len(suitable_rooms)
+                               + max(room_idx, 0))
+            return slot_idx, room_idx
+
+        return check
 
     def _schedule_session(self, course: Course, session_type: SessionType,
-                          session_number: int,
+                          session_number: int, student_key: str,
+                          suitable_rooms: List[Room], counts: List[int],
                           forced_slot: Optional[TimeSlot] = None) -> bool:
         """Try to place a single session. If `forced_slot` is given, only that
-        slot is tried (used for basket-pinned elective sessions)."""
-        suitable_rooms = self._get_suitable_rooms(course, session_type)
+        slot is tried (used for basket-pinned elective sessions).
+
+        `student_key` and `suitable_rooms` are computed once per course by
+        `schedule_course` rather than on every attempt.  Rejections are
+        counted into `counts`, indexed by the R_* reason codes.
+
+        Slots are int bitmasks (bit i ↔ time_slots[i]), so each check
+        filters all candidate slots at once; the winner is the first free
+        slot in `slot_order` (least-occupied first)."""
         if not suitable_rooms:
-            self.conflict_reasons["No suitable room"] += 1
+            counts[R_NO_ROOM] += 1
+            return False
+
+        check = self._checkers[session_type]
+        slot_idx, room_idx = check(course, student_key, suitable_rooms,
+                                   counts, forced_slot)
+        if slot_idx < 0:
             return False
+        self._record_session(course, session_type, self.time_slots[slot_idx],
+                             suitable_rooms[room_idx], session_number, student_key)
+        return True
 
-        required      = {SessionType.LECTURE: 1.5,
-                         SessionType.TUTORIAL: 1.0,
-                         SessionType.PRACTICAL: 2.0}
-        candidate_slots = ([forced_slot] if forced_slot is not None
-                           else self.slots_by_duration[required[session_type]])
-
-        for time_slot in candidate_slots:
-            for room in suitable_rooms:
-                valid, _ = self._check_constraints(course, session_type,
-                                                   time_slot, room)
-                if valid:
-                    self._record_session(course, session_type,
-                                         time_slot, room, session_number)
-                    return True
-        return False
+    def _reorder_slots(self) -> None:
+        """
+        Re-sort each duration's slots least-occupied first, by how many
+        faculty, rooms and student groups are already busy in each slot
+        (`slot_occupancy`, maintained by _record_session).  Trying quiet
+        slots first finds a free (slot, room) sooner and spreads load away
+        from the slots later courses will be fighting over.
+        The sort is stable, so ties keep day/time order.
+        """
+        occupancy = self.slot_occupancy
+        for duration, slots in self.slots_by_duration.items():
+            slots.sort(key=lambda s: occupancy[s.idx])
+            self.slot_order[duration] = [s.bit for s in slots]
 
     # ------------------------------------------------------------------
     # FIX #2: Basket slot pre-assignment
@@ -374,13 +599,11 @@ class ImprovedScheduler:
                 ok = True
                 for course in basket_courses:
                     # Check faculty and student availability for this candidate
-                    if _slot_overlaps_any(candidate,
-                                          self.faculty_slots[course.faculty_name]):
+                    if self.faculty_slots[course.faculty_name] & candidate.bit:
                         ok = False; break
                     student_key = course.get_student_key()
                     semester_half = course.semester_half
-                    if _slot_overlaps_any(candidate,
-                                          self.student_slots[student_key][semester_half]):
+                    if self.student_slots[(student_key, semester_half)] & candidate.bit:
                         ok = False; break
                 if ok:
                     self.basket_slots[basket_id] = candidate
@@ -390,7 +613,9 @@ class ImprovedScheduler:
                 print(f"  ⚠️  Basket {basket_id}: no shared slot found – "
                       "courses will be scheduled independently")
 
-    def _schedule_basket_course(self, course: Course) -> int:
+    def _schedule_basket_course(self, course: Course, student_key: str,
+                                suitable_by_type: Dict[SessionType, List[Room]],
+                                counts: List[int]) -> int:
         """Schedule a basket elective course, pinning lectures to the basket slot."""
         scheduled = 0
         basket_slot = self.basket_slots.get(course.basket)
@@ -407,22 +632,31 @@ class ImprovedScheduler:
                 forced = (basket_slot
                           if session_type == SessionType.LECTURE and basket_slot
                           else None)
-                if self._schedule_session(course, session_type,
-                                          session_num, forced_slot=forced):
+                if self._schedule_session(course, session_type, session_num,
+                                          student_key, suitable_by_type[session_type],
+                                          counts, forced_slot=forced):
                     scheduled += 1
                 else:
                     self.conflicts.append(
                         f"{course.course_code} ({course.branch} "
                         f"{course.section or ''} {course.semester_half}) - "
-                        f"{session_type.value} #{session_num} "
+                        f"{SESSION_NAMES[session_type]} #{session_num} "
                         f"[basket {course.basket}] - Faculty: {course.faculty_name}"
                     )
         return scheduled
 
     def schedule_course(self, course: Course) -> int:
         """Schedule all sessions for a course."""
+        student_key      = course.get_student_key()
+        suitable_by_type = {st: self._get_suitable_rooms(course, st)
+                            for st in SessionType}
+        # Rejection counts per R_* code, folded into conflict_reasons at the end
+        counts = [0] * len(REASON_NAMES)
         if course.basket:
-            return self._schedule_basket_course(course)
+            scheduled = self._schedule_basket_course(course, student_key,
+                                                     suitable_by_type, counts)
+            self._flush_reasons(counts)
+            return scheduled
 
         sessions_needed = [
             (SessionType.LECTURE,   course.lectures),
@@ -432,55 +666,322 @@ class ImprovedScheduler:
         scheduled = 0
         for session_type, count in sessions_needed:
             for session_num in range(1, count + 1):
-                if self._schedule_session(course, session_type, session_num):
+                if self._schedule_session(course, session_type, session_num,
+                                          student_key, suitable_by_type[session_type],
+                                          counts):
                     scheduled += 1
                 else:
                     self.conflicts.append(
                         f"{course.course_code} ({course.branch} "
                         f"{course.section or ''} {course.semester_half}) - "
-                        f"{session_type.value} #{session_num} "
+                        f"{SESSION_NAMES[session_type]} #{session_num} "
                         f"- Faculty: {course.faculty_name}"
                     )
+        self._flush_reasons(counts)
         return scheduled
 
     # ------------------------------------------------------------------
     # Main entry point
     # ------------------------------------------------------------------
 
-    def generate_timetable(self) -> Dict:
+    def generate_timetable(self, backend: str = "greedy",
+                           time_limit: float = _CPSAT_TIME_LIMIT_S) -> Dict:
+        """Schedule every course and return the exported timetable.
+
+        `backend` is "greedy" (default, standard library only) or "cpsat",
+        which solves the whole week as one OR-Tools CP-SAT model within
+        `time_limit` seconds."""
+        if backend not in ("greedy", "cpsat"):
+            raise ValueError(f"Unknown backend {backend!r}")
+        if backend == "cpsat" and cp_model is None:
+            raise ImportError("The cpsat backend needs OR-Tools: pip install ortools")
+
         print("\n" + "="*60)
         print("GENERATING TIMETABLE")
         print("="*60)
 
         # Sort: non-electives first (practicals first, larger groups first),
-        # then electives; within each half, sort by semester.
-        sorted_courses = sorted(
-            self.courses,
-            key=lambda c: (
-                c.semester_half,
-                c.semester,
-                1 if c.is_elective else 0,   # non-electives first
-                -c.practicals,
-                -c.num_students,
-            )
-        )
+        # then electives; within each half, sort by semester.  When every
+        # field fits, the key is packed into one int per course so the sort
+        # compares plain ints:
+        #   half rank | semester (8 bits) | elective (1) |
+        #   255 - practicals (8) | 65535 - num_students (16)
+        half_rank = {h: i for i, h in
+                     enumerate(sorted({c.semester_half for c in self.courses}))}
+        if all(0 <= c.semester <= 0xFF and 0 <= c.practicals <= 0xFF
+               and 0 <= c.num_students <= 0xFFFF for c in self.courses):
+            for c in self.courses:
+                rank = (half_rank[c.semester_half] << 8) | c.semester
+                rank = (rank << 1)  | c.is_elective          # non-electives first
+                rank = (rank << 8)  | (0xFF - c.practicals)
+                rank = (rank << 16) | (0xFFFF - c.num_students)
+                c._rank = rank
+            sort_key = attrgetter("_rank")
+        else:
+            # Out-of-range value would bleed into its neighbours – same
+            # order, compared as a tuple
+            sort_key = lambda c: (half_rank[c.semester_half], c.semester,
+                                  c.is_elective, -c.practicals, -c.num_students)
+        sorted_courses = sorted(self.courses, key=sort_key)
+
+        if backend == "cpsat":
+            total_sessions = self._schedule_cpsat(sorted_courses, time_limit)
+        else:
+            total_sessions = self._schedule_greedy(sorted_courses)
+
+        print(f"\n✓ Scheduled {total_sessions} sessions")
+        print(f"⚠️  {len(self.conflicts)} unscheduled sessions")
+
+        print("\n📊 Conflict Breakdown:")
+        for reason, count in self.conflict_reasons.most_common():
+            print(f"   {reason}: {count}")
+
+        return self.export_timetable()
 
+    def _schedule_greedy(self, sorted_courses: List[Course]) -> int:
         # Pre-assign basket slots BEFORE scheduling any elective
         print("\nAssigning elective basket slots…")
         self._assign_basket_slots()
 
+        # Halves are scheduled in one sequential pass, not in parallel: they
+        # share faculty (FIX #6), rooms and basket slots, so Sem-II placement
+        # depends on Sem-I bookings, and a full run takes a few tens of
+        # milliseconds – less than starting a worker process.
         total_sessions = 0
-        for course in sorted_courses:
+        for i, course in enumerate(sorted_courses):
+            if i and i % _SLOT_REORDER_EVERY == 0:
+                self._reorder_slots()
             total_sessions += self.schedule_course(course)
+        return total_sessions
 
-        print(f"\n✓ Scheduled {total_sessions} sessions")
-        print(f"⚠️  {len(self.conflicts)} unscheduled sessions")
+    # ------------------------------------------------------------------
+    # CP-SAT backend
+    # ------------------------------------------------------------------
 
-        print("\n📊 Conflict Breakdown:")
-        for reason, count in self.conflict_reasons.most_common():
-            print(f"   {reason}: {count}")
+    def _overlap_cells(self) -> List[List[int]]:
+        """
+        Split each day at every slot start/end time and return, for each
+        resulting cell, the indices of the slots covering it.  Two slots
+        overlap exactly when they share a cell, so "at most one booking per
+        cell" is the no-overlap rule.
+        """
+        bounds: Dict[str, set] = defaultdict(set)
+        for slot in self.time_slots:
+            bounds[slot.day].update((slot.start_time, slot.end_time))
+
+        cells = []
+        for day, points in bounds.items():
+            points = sorted(points)
+            for lo, hi in zip(points, points[1:]):
+                covering = [slot.idx for slot in self.time_slots
+                            if slot.day == day
+                            and slot.start_time <= lo and hi <= slot.end_time]
+                if covering:
+                    cells.append(covering)
+        return cells
+
+    def _room_pools(self) -> Dict[tuple, List[Room]]:
+        """
+        Partition rooms into pools of interchangeable rooms: same capacity and
+        same big/regular/lab membership.  Every suitable-room list is a union
+        of whole pools, so the model only has to pick a pool per session.
+        A room ID listed twice is one physical room (room_slots is keyed by
+        ID), so only its first entry joins a pool.
+        """
+        big, regular, labs = set(map(id, self.big_rooms)), \
+            set(map(id, self.regular_rooms)), set(map(id, self.labs))
+        unique: Dict[str, Room] = {}
+        for room in self.rooms:
+            unique.setdefault(room.room_id, room)
+        pools: Dict[tuple, List[Room]] = defaultdict(list)
+        for room in unique.values():
+            key = (room.capacity, id(room) in big, id(room) in regular, id(room) in labs)
+            pools[key].append(room)
+        return pools
+
+    def _schedule_cpsat(self, sorted_courses: List[Course], time_limit: float) -> int:
+        """
+        Place all sessions at once with a CP-SAT model, maximising the number
+        of sessions scheduled.  One boolean per (session, slot, room pool),
+        with:
+
+          - each session placed at most once;
+          - per overlap cell: at most |pool| bookings in each room pool, and
+            at most one booking for each faculty (across both halves, FIX #6)
+            and each (student group, half);
+          - the daily limit (FIX #3): at most one of Lecture+Tutorial, of
+            Lecture+Practical, of Tutorial and of Practical per course/day;
+          - FIX #2: the k-th lecture of every course in a basket shares one
+            basket-wide slot; students see that slot once, since they attend
+            only one of the basket's options.  (The greedy pass instead books
+            the group for the first basket course and rejects the others in
+            the same group as "Students busy".)
+
+        Rooms in a pool are interchangeable, so concrete rooms are handed out
+        afterwards by first-fit in start-time order, which always succeeds
+        for intervals within the pool's per-cell limit.
+
+        The greedy pass is run first on a scratch scheduler: its placements
+        are the solver's starting hint, and its session count is the bar the
+        solution must reach – otherwise (or with no solution in time) the
+        greedy pass is used instead, so `--cpsat` never does worse.
+        """
+        print("\nBuilding CP-SAT model…")
+        model = cp_model.CpModel()
+        cells = self._overlap_cells()
+        pools = self._room_pools()
+        pool_of = {room.room_id: key for key, rooms in pools.items() for room in rooms}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            greedy       = ImprovedScheduler(self.courses, self.rooms)
+            greedy_total = greedy._schedule_greedy(sorted_courses)
+        # (course_id, type, number) → (slot_idx, pool) in the greedy schedule
+        greedy_at = {(s.course.course_id, s.session_type, s.session_number):
+                     (s.time_slot.idx, pool_of[s.room.room_id])
+                     for s in greedy.schedule}
+        greedy_basket = {(s.basket, s.session_number, s.time_slot.idx)
+                         for s in greedy.schedule
+                         if s.basket and s.session_type == SessionType.LECTURE}
+
+        sessions: List[Tuple[Course, SessionType, int, List[Room]]] = []
+        for course in sorted_courses:
+            for session_type, count in ((SessionType.LECTURE,   course.lectures),
+                                        (SessionType.TUTORIAL,  course.tutorials),
+                                        (SessionType.PRACTICAL, course.practicals)):
+                rooms = self._get_suitable_rooms(course, session_type)
+                for number in range(1, count + 1):
+                    sessions.append((course, session_type, number, rooms))
+
+        # choice[i] → [(slot, pool key, var)] for session i
+        choice: List[List[Tuple[TimeSlot, tuple, object]]] = []
+        # (owner..., slot_idx) → vars booking that owner in that slot
+        pool_terms:    Dict[Tuple[tuple, int], list] = defaultdict(list)
+        faculty_terms: Dict[Tuple[str, int], list] = defaultdict(list)
+        student_terms: Dict[Tuple[str, str, int], list] = defaultdict(list)
+        daily_terms:   Dict[Tuple[str, str, SessionType], list] = defaultdict(list)
+        basket_slot:   Dict[Tuple[str, int], Dict[int, object]] = defaultdict(dict)
+        basket_groups: Dict[Tuple[str, int], set] = defaultdict(set)
+
+        for i, (course, session_type, number, rooms) in enumerate(sessions):
+            if not rooms:
+                choice.append([])               # reported as "No suitable room"
+                continue
+            session_pools = list(dict.fromkeys(pool_of[r.room_id] for r in rooms))
+            pinned  = course.basket and session_type == SessionType.LECTURE
+            hint    = greedy_at.get((course.course_id, session_type, number))
+            options = []
+            for slot in self.slots_by_duration[_SESSION_HOURS[session_type]]:
+                slot_vars = []
+                for pool in session_pools:
+                    var = model.NewBoolVar(f"s{i}_t{slot.idx}_p{len(options)}")
+                    model.AddHint(var, hint == (slot.idx, pool))
+                    options.append((slot, pool, var))
+                    slot_vars.append(var)
+                    pool_terms[(pool, slot.idx)].append(var)
+                faculty_terms[(course.faculty_name, slot.idx)].extend(slot_vars)
+                daily_terms[(course.course_id, slot.day, session_type)].extend(slot_vars)
+                if pinned:
+                    shared = basket_slot[(course.basket, number)]
+                    if slot.idx not in shared:
+                        shared[slot.idx] = model.NewBoolVar(
+                            f"b{course.basket}_{number}_t{slot.idx}")
+                    model.Add(sum(slot_vars) <= shared[slot.idx])
+                else:
+                    student_terms[(course.get_student_key(), course.semester_half,
+                                   slot.idx)].extend(slot_vars)
+            if pinned:
+                basket_groups[(course.basket, number)].add(
+                    (course.get_student_key(), course.semester_half))
+            choice.append(options)
+            model.Add(sum(var for _, _, var in options) <= 1)
+
+        for key, shared in basket_slot.items():
+            model.Add(sum(shared.values()) <= 1)
+            for slot_idx, var in shared.items():
+                model.AddHint(var, key + (slot_idx,) in greedy_basket)
+            for student_key, half in basket_groups[key]:
+                for slot_idx, var in shared.items():
+                    student_terms[(student_key, half, slot_idx)].append(var)
+
+        # Overlap limits, one constraint per (owner, cell)
+        for terms, limit in ((pool_terms,    lambda pool: len(pools[pool])),
+                             (faculty_terms, lambda _: 1),
+                             (student_terms, lambda _: 1)):
+            by_owner: Dict[tuple, Dict[int, list]] = defaultdict(dict)
+            for key, vars_ in terms.items():
+                by_owner[key[:-1]][key[-1]] = vars_
+            for owner, slot_vars in by_owner.items():
+                cap = limit(owner[0])
+                for cell in cells:
+                    busy = [v for slot_idx in cell for v in slot_vars.get(slot_idx, ())]
+                    if len(busy) > cap:
+                        model.Add(sum(busy) <= cap)
+
+        # Daily limit (FIX #3): no same type twice, no Lecture+Tutorial,
+        # no Lecture+Practical – which also caps a day at 2 sessions
+        for cid, day in {(cid, day) for cid, day, _ in daily_terms}:
+            lec = daily_terms.get((cid, day, SessionType.LECTURE),   [])
+            tut = daily_terms.get((cid, day, SessionType.TUTORIAL),  [])
+            prc = daily_terms.get((cid, day, SessionType.PRACTICAL), [])
+            for group in (lec + tut, lec + prc, tut, prc):
+                if len(group) > 1:
+                    model.Add(sum(group) <= 1)
+
+        model.Maximize(sum(var for options in choice for _, _, var in options))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_workers         = _CPSAT_WORKERS
+        print(f"Solving ({len(sessions)} sessions, "
+              f"{sum(len(o) for o in choice)} placement variables)…")
+        status = solver.Solve(model)
+        print(f"  CP-SAT status: {solver.StatusName(status)}")
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print("  ⚠️  CP-SAT found no solution in time – using greedy pass")
+            return self._schedule_greedy(sorted_courses)
+        if solver.ObjectiveValue() < greedy_total:
+            print(f"  ⚠️  CP-SAT placed {solver.ObjectiveValue():.0f} sessions, "
+                  f"greedy {greedy_total} – using greedy pass")
+            return self._schedule_greedy(sorted_courses)
+
+        placed: Dict[int, Tuple[TimeSlot, tuple]] = {}
+        for i, options in enumerate(choice):
+            for slot, pool, var in options:
+                if solver.Value(var):
+                    placed[i] = (slot, pool)
+                    break
 
-        return self.export_timetable()
+        # First-fit rooms within each pool, in slot start-time order
+        room_of: Dict[int, Room] = {}
+        busy = {room.room_id: 0 for room in self.rooms}
+        for i in sorted(placed, key=lambda i: placed[i][0].start_time):
+            slot, pool = placed[i]
+            room = next((r for r in pools[pool] if not busy[r.room_id] & slot.bit),
+                        None)
+            if room is None:                    # pool over-booked; report it
+                del placed[i]
+                continue
+            busy[room.room_id] |= slot.conflict_mask
+            room_of[i] = room
+
+        total_sessions = 0
+        for i, (course, session_type, number, rooms) in enumerate(sessions):
+            if i not in placed:
+                reason = R_CPSAT_UNPLACED if rooms else R_NO_ROOM
+                self.conflict_reasons[REASON_NAMES[reason]] += 1
+                basket = f"[basket {course.basket}] " if course.basket else ""
+                self.conflicts.append(
+                    f"{course.course_code} ({course.branch} "
+                    f"{course.section or ''} {course.semester_half}) - "
+                    f"{SESSION_NAMES[session_type]} #{number} "
+                    f"{basket}- Faculty: {course.faculty_name}"
+                )
+                continue
+            self._record_session(course, session_type, placed[i][0], room_of[i],
+                                 number, course.get_student_key())
+            total_sessions += 1
+        return total_sessions
 
     # ------------------------------------------------------------------
     # Export helpers
@@ -506,11 +1007,11 @@ class ImprovedScheduler:
                     "section":       s.course.section,
                     "is_elective":   s.course.is_elective,
                     "basket":        s.basket,
-                    "session_type":  s.session_type.value,
+                    "session_type":  SESSION_NAMES[s.session_type],
                     "session_number": s.session_number,
                     "day":           s.time_slot.day,
-                    "start_time":    s.time_slot.start_time.strftime("%H:%M"),
-                    "end_time":      s.time_slot.end_time.strftime("%H:%M"),
+                    "start_time":    s.time_slot.start_str,
+                    "end_time":      s.time_slot.end_str,
                     "room":          s.room.room_id,
                     "room_capacity": s.room.capacity,
                     "faculty":       s.faculty_name,
@@ -530,11 +1031,10 @@ class ImprovedScheduler:
                 "course_code":    s.course.course_code,
                 "course_title":   s.course.course_title,
                 "semester_half":  s.course.semester_half,
-                "session_type":   s.session_type.value,
+                "session_type":   SESSION_NAMES[s.session_type],
                 "session_number": s.session_number,
                 "day":            s.time_slot.day,
-                "time":           (f"{s.time_slot.start_time.strftime('%H:%M')}"
-                                   f"-{s.time_slot.end_time.strftime('%H:%M')}"),
+                "time":           f"{s.time_slot.start_str}-{s.time_slot.end_str}",
                 "room":           s.room.room_id,
                 "faculty":        s.faculty_name,
                 "is_elective":    s.course.is_elective,
@@ -606,15 +1106,50 @@ def load_data(filepath: str):
     return courses, rooms
 
 
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def _write_json(data, path: str) -> None:
+    """Write `data` as 2-space-indented JSON, using orjson when available."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
+def _positive_seconds(value: str) -> float:
+    """argparse type for --time-limit: a number of seconds greater than 0."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}")
+    if not seconds > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return seconds
+
+
 def main():
     import sys, os
 
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Generate the course timetable.")
+    parser.add_argument("input_file", nargs="?",
+                        help="course/room JSON (default: input.json)")
+    parser.add_argument("--cpsat", action="store_true",
+                        help="solve with OR-Tools CP-SAT (pip install ortools)")
+    parser.add_argument("--time-limit", type=_positive_seconds,
+                        default=_CPSAT_TIME_LIMIT_S, metavar="SECONDS",
+                        help=f"CP-SAT time budget (default: {_CPSAT_TIME_LIMIT_S:g})")
+    args = parser.parse_args()
+
+    if args.input_file:
+        input_file = args.input_file
     else:
         possible_files = [
             "input.json",
@@ -629,16 +1164,19 @@ def main():
     courses, rooms = load_data(input_file)
 
     scheduler  = ImprovedScheduler(courses, rooms)
-    timetable  = scheduler.generate_timetable()
+    try:
+        timetable = scheduler.generate_timetable(
+            "cpsat" if args.cpsat else "greedy", args.time_limit)
+    except ImportError as exc:
+        print(f"❌ Error: {exc}")
+        sys.exit(1)
 
     output_dir = "/mnt/user-data/outputs"
     os.makedirs(output_dir, exist_ok=True)
 
-    with open(f"{output_dir}/timetable_output.json", "w") as f:
-        json.dump(timetable, f, indent=2)
-
-    with open(f"{output_dir}/timetable_by_student.json", "w") as f:
-        json.dump(scheduler.export_by_student_group(), f, indent=2)
+    _write_json(timetable, f"{output_dir}/timetable_output.json")
+    _write_json(scheduler.export_by_student_group(),
+                f"{output_dir}/timetable_by_student.json")
 
     print(f"\n✓ Files saved to {output_dir}:")
     print("  - timetable_output.json")